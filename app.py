@@ -12,21 +12,29 @@ Deploy on Render.com or run locally
 """
 
 import os
+import re
 import asyncio
 import logging
+import time
+from collections import Counter, deque
 from datetime import datetime, timezone
+from pathlib import Path
 from contextlib import asynccontextmanager
 
+import orjson
+
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from telegram import Update, Bot
+from telegram.error import BadRequest
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 
 from downloader import SsstikDownloader
@@ -49,24 +57,98 @@ db = Database(SUPABASE_URL, SUPABASE_KEY)
 downloader = SsstikDownloader()
 telegram_app = None
 
-# Queue system for downloads (1 at a time)
-download_queue = asyncio.Queue()
-is_processing = False
 
-# Cooldown tracking (user_id -> last_download_time)
-user_cooldowns: dict[int, datetime] = {}
-COOLDOWN_SECONDS = 15
+class DownloadQueue:
+    """
+    Bounded FIFO for the download workers.
+    Mirrors the asyncio.Queue methods used here, backed by a deque and a
+    single Event rather than a Future per put/get.
+    """
+    
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._not_empty = asyncio.Event()
+    
+    def qsize(self) -> int:
+        return len(self._items)
+    
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self._items)
+    
+    def put_nowait(self, item):
+        if self.full():
+            raise asyncio.QueueFull
+        self._items.append(item)
+        self._not_empty.set()
+    
+    async def get(self):
+        while not self._items:
+            await self._not_empty.wait()
+        item = self._items.popleft()
+        if not self._items:
+            self._not_empty.clear()
+        return item
+    
+    def task_done(self):
+        pass
+
+
+# Queue system for downloads (processed by DOWNLOAD_WORKERS workers, which
+# is also the cap on concurrent downloads)
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "3"))
+MAX_QUEUE_SIZE = 50
+MAX_USER_ENQUEUED = max(1, DOWNLOAD_WORKERS - 1)  # One user can't take every worker (with 2+ workers)
+download_queue = DownloadQueue(maxsize=MAX_QUEUE_SIZE)
+active_downloads = 0
+
+# Downloads queued or in progress per user (user_id -> count)
+user_enqueued: Counter[int] = Counter()
+
+# Cooldown tracking (user_id -> last_download_time, time.monotonic())
+user_cooldowns: dict[int, float] = {}
+COOLDOWN_SECONDS = 15.0
+COOLDOWN_SWEEP_SECONDS = 60
+
+# Dashboard assets
+STATIC_DIR = Path(__file__).parent / "static"
 
+# TikTok link detection (real links are well under MAX_MESSAGE_LENGTH)
+TIKTOK_RE = re.compile(r'(?i)\btiktok\.com/')
+MAX_MESSAGE_LENGTH = 512
 
-async def download_worker():
-    """Background worker that processes downloads one at a time"""
-    global is_processing
+QUEUE_FULL_MESSAGE = "🚫 Queue is full, please try again in a minute."
+VIDEO_CAPTION = "✅ Here's your video without watermark!\n\n🤖 Powered by @BadCodeWriter"
+
+# Telegram fetches a video sent by URL before it answers (up to 20 MB)
+DIRECT_SEND_READ_TIMEOUT = 60.0
+
+# Sending by URL is turned off after this many rejections in a row
+# (e.g. the CDN blocks Telegram), so later videos go straight to upload
+DIRECT_SEND_MAX_FAILURES = 3
+direct_send_failures = 0
+
+
+# Pending file cleanups (kept so the tasks aren't garbage collected)
+cleanup_tasks: set[asyncio.Task] = set()
+
+
+def release_file(path: str):
+    """Hand a sent file back to the downloader without waiting for cleanup"""
+    task = asyncio.create_task(downloader.release(path))
+    cleanup_tasks.add(task)
+    task.add_done_callback(cleanup_tasks.discard)
+
+
+async def download_worker(worker_id: int):
+    """Background worker that processes queued downloads one at a time"""
+    global active_downloads, direct_send_failures
     
     while True:
         try:
             # Get next item from queue
             task = await download_queue.get()
-            is_processing = True
+            active_downloads += 1
             
             user_id = task['user_id']
             message_text = task['url']
@@ -81,22 +163,52 @@ async def download_worker():
                 except:
                     pass
                 
-                # Download the video
-                result = await downloader.download_video(message_text)
+                # Download the video (small ones come back as a URL Telegram can fetch)
+                result = await downloader.download_video(
+                    message_text,
+                    allow_direct=direct_send_failures < DIRECT_SEND_MAX_FAILURES
+                )
+                
+                if result['success'] and result['direct_url']:
+                    try:
+                        await update.message.reply_video(
+                            video=result['direct_url'],
+                            caption=VIDEO_CAPTION,
+                            read_timeout=DIRECT_SEND_READ_TIMEOUT
+                        )
+                        direct_send_failures = 0
+                    except BadRequest as e:
+                        # Telegram couldn't fetch it (e.g. hotlinking blocked), upload it ourselves.
+                        # Timeouts and flood limits are left to the error path: the video may
+                        # still arrive, and uploading again would send it twice.
+                        logger.warning(f"Sending by URL failed, uploading file instead: {e}")
+                        direct_send_failures += 1
+                        if direct_send_failures == DIRECT_SEND_MAX_FAILURES:
+                            logger.warning("Sending by URL keeps failing, uploading all videos from now on")
+                        
+                        # Save the CDN link we already have instead of resolving it again
+                        result = await downloader.download_video(
+                            message_text,
+                            resolved_url=result['direct_url']
+                        )
                 
                 if result['success']:
                     # Track successful download
                     await db.track_download(user_id, message_text, True)
                     
-                    # Send the video file
-                    with open(result['download_path'], 'rb') as video_file:
-                        await update.message.reply_video(
-                            video=video_file,
-                            caption="✅ Here's your video without watermark!\n\n🤖 Powered by @BadCodeWriter"
-                        )
-                    
-                    # Clean up the file
-                    os.remove(result['download_path'])
+                    if result['download_path']:
+                        video_path = Path(result['download_path'])
+                        try:
+                            # Read the file off the event loop, then send it
+                            video_bytes = await asyncio.to_thread(video_path.read_bytes)
+                            await update.message.reply_video(
+                                video=video_bytes,
+                                filename=video_path.name,
+                                caption=VIDEO_CAPTION
+                            )
+                        finally:
+                            # Clean up the file, even if sending failed
+                            release_file(result['download_path'])
                     
                     try:
                         await processing_msg.delete()
@@ -126,52 +238,96 @@ async def download_worker():
                     pass
             
             finally:
+                user_enqueued[user_id] -= 1
+                if user_enqueued[user_id] <= 0:
+                    del user_enqueued[user_id]
                 download_queue.task_done()
-                is_processing = False
+                active_downloads -= 1
                 
         except asyncio.CancelledError:
             break
         except Exception as e:
-            logger.error(f"Queue worker error: {e}")
-            is_processing = False
+            logger.error(f"Queue worker {worker_id} error: {e}")
+
+
+async def cooldown_sweeper():
+    """Periodically drop cooldown entries that have already expired"""
+    while True:
+        await asyncio.sleep(COOLDOWN_SWEEP_SECONDS)
+        now = time.monotonic()
+        expired = [
+            uid for uid, last_download in user_cooldowns.items()
+            if now - last_download >= COOLDOWN_SECONDS
+        ]
+        for uid in expired:
+            del user_cooldowns[uid]
 
 
 # ============== Telegram Bot Handlers ==============
 
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /start command"""
-    user = update.effective_user
-    
-    # Track user
-    await db.track_user(user.id, user.username or user.first_name)
-    
-    welcome_message = f"""
-🎬 **TikTok Video Downloader Bot**
+# Formatted bot replies use MarkdownV2; anything user-supplied goes through escape_md()
+_MDV2_ESCAPES = str.maketrans({c: '\\' + c for c in '\\_*[]()~`>#+-=|{}.!'})
+
+
+def escape_md(text: str) -> str:
+    """Escape text for Telegram MarkdownV2"""
+    return text.translate(_MDV2_ESCAPES)
 
-Hi {user.first_name}! 👋
 
-Send me a TikTok video link and I'll download it for you without watermark!
+WELCOME_MESSAGE = r"""
+🎬 *TikTok Video Downloader Bot*
 
-**How to use:**
-1. Copy a TikTok video link
-2. Paste it here
-3. Get your video!
+Hi {name}\! 👋
 
-**Supported links:**
+Send me a TikTok video link and I'll download it for you without watermark\!
+
+*How to use:*
+1\. Copy a TikTok video link
+2\. Paste it here
+3\. Get your video\!
+
+*Supported links:*
 • `https://www.tiktok.com/@user/video/...`
 • `https://vm.tiktok.com/...`
 
-📊 /stats - View your download stats
-❓ /help - Show this message
+📊 /stats \- View your download stats
+❓ /help \- Show this message
 
 ⏱️ Note: 15 second cooldown between downloads
-    """
-    await update.message.reply_text(welcome_message, parse_mode='Markdown')
+"""
+
+STATS_MESSAGE = """
+📊 *Your Download Statistics*
+
+📥 Total Downloads: *{total_downloads:,}*
+✅ Successful: *{successful_downloads:,}*
+❌ Failed: *{failed_downloads:,}*
+
+📅 Today: *{today_downloads:,}*
+
+🕐 Updated: {updated}
+"""
+
+
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /start command"""
+    user = update.effective_user
+    
+    # Track user
+    await db.track_user(user.id, user.username or user.first_name)
+    
+    await update.message.reply_text(
+        WELCOME_MESSAGE.format(name=escape_md(user.first_name)),
+        parse_mode='MarkdownV2'
+    )
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /help command"""
-    await start_command(update, context)
+    """Handle /help command (same text as /start, without tracking the user)"""
+    await update.message.reply_text(
+        WELCOME_MESSAGE.format(name=escape_md(update.effective_user.first_name)),
+        parse_mode='MarkdownV2'
+    )
 
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -181,18 +337,11 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Get user's personal stats
     user_stats = await db.get_user_stats(user.id)
     
-    stats_message = f"""
-📊 **Your Download Statistics**
-
-📥 Total Downloads: **{user_stats['total_downloads']:,}**
-✅ Successful: **{user_stats['successful_downloads']:,}**
-❌ Failed: **{user_stats['failed_downloads']:,}**
-
-📅 Today: **{user_stats['today_downloads']:,}**
-
-🕐 Updated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}
-    """
-    await update.message.reply_text(stats_message, parse_mode='Markdown')
+    stats_message = STATS_MESSAGE.format(
+        **user_stats,
+        updated=escape_md(datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'))
+    )
+    await update.message.reply_text(stats_message, parse_mode='MarkdownV2')
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -201,28 +350,38 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message_text = update.message.text.strip()
     
     # Check if it's a TikTok URL
-    if 'tiktok.com' not in message_text.lower():
+    if len(message_text) > MAX_MESSAGE_LENGTH or not TIKTOK_RE.search(message_text):
         await update.message.reply_text(
-            "❌ Please send a valid TikTok video link.\n\n"
+            "❌ Please send a valid TikTok video link\\.\n\n"
             "Example: `https://www.tiktok.com/@user/video/123456789`",
-            parse_mode='Markdown'
+            parse_mode='MarkdownV2'
         )
         return
     
     # Check cooldown
-    now = datetime.now(timezone.utc)
-    if user.id in user_cooldowns:
-        last_download = user_cooldowns[user.id]
-        elapsed = (now - last_download).total_seconds()
-        remaining = COOLDOWN_SECONDS - elapsed
+    now = time.monotonic()
+    last_download = user_cooldowns.get(user.id)
+    if last_download is not None:
+        remaining = COOLDOWN_SECONDS - (now - last_download)
         
         if remaining > 0:
             await update.message.reply_text(
-                f"⏱️ Please wait **{int(remaining)}** seconds before downloading again.",
-                parse_mode='Markdown'
+                f"⏱️ Please wait *{int(remaining)}* seconds before downloading again\\.",
+                parse_mode='MarkdownV2'
             )
             return
     
+    # Limit how many downloads one user can have waiting
+    if user_enqueued[user.id] >= MAX_USER_ENQUEUED:
+        await update.message.reply_text(
+            "⏳ You already have downloads in the queue. Please wait for them to finish."
+        )
+        return
+    
+    if download_queue.full():
+        await update.message.reply_text(QUEUE_FULL_MESSAGE)
+        return
+    
     # Update cooldown
     user_cooldowns[user.id] = now
     
@@ -231,32 +390,48 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if queue_size > 0:
         processing_msg = await update.message.reply_text(
-            f"⏳ Added to queue. Position: **{queue_size + 1}**\n"
-            f"Please wait...",
-            parse_mode='Markdown'
+            f"⏳ Added to queue\\. Position: *{queue_size + 1}*\n"
+            "Please wait\\.\\.\\.",
+            parse_mode='MarkdownV2'
         )
     else:
         processing_msg = await update.message.reply_text("⏳ Processing your video...")
     
     # Add to queue
-    await download_queue.put({
-        'user_id': user.id,
-        'url': message_text,
-        'update': update,
-        'processing_msg': processing_msg,
-        'queue_position': queue_size + 1
-    })
+    try:
+        download_queue.put_nowait({
+            'user_id': user.id,
+            'url': message_text,
+            'update': update,
+            'processing_msg': processing_msg,
+            'queue_position': queue_size + 1
+        })
+    except asyncio.QueueFull:
+        # Queue filled up while we were replying
+        user_cooldowns.pop(user.id, None)
+        await processing_msg.edit_text(QUEUE_FULL_MESSAGE)
+        return
+    
+    user_enqueued[user.id] += 1
 
 
 # ============== FastAPI App ==============
 
-# Track the worker task
-worker_task = None
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson"""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+# Track the worker tasks
+worker_tasks: list[asyncio.Task] = []
+sweeper_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
-    global telegram_app, worker_task
+    global telegram_app, worker_tasks, sweeper_task
     
     # Startup
     logger.info("Starting up...")
@@ -266,9 +441,11 @@ async def lifespan(app: FastAPI):
     # Initialize database
     await db.initialize()
     
-    # Start the download worker
-    worker_task = asyncio.create_task(download_worker())
-    logger.info("Download queue worker started")
+    # Start the download workers
+    worker_tasks = [asyncio.create_task(download_worker(i)) for i in range(DOWNLOAD_WORKERS)]
+    logger.info(f"Download queue workers started ({DOWNLOAD_WORKERS})")
+    
+    sweeper_task = asyncio.create_task(cooldown_sweeper())
     
     # Setup Telegram bot
     if TELEGRAM_BOT_TOKEN:
@@ -294,13 +471,16 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down...")
     
-    # Stop worker
-    if worker_task:
-        worker_task.cancel()
-        try:
-            await worker_task
-        except asyncio.CancelledError:
-            pass
+    # Stop workers
+    for task in worker_tasks:
+        task.cancel()
+    await asyncio.gather(*worker_tasks, return_exceptions=True)
+    
+    if sweeper_task:
+        sweeper_task.cancel()
+    
+    await db.close()
+    await downloader.aclose()
     
     if telegram_app:
         if telegram_app.updater.running:
@@ -313,8 +493,11 @@ app = FastAPI(
     title="TikTok Downloader Bot",
     description="Telegram bot for downloading TikTok videos",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 
 # ============== API Endpoints ==============
@@ -333,7 +516,7 @@ async def health_check():
 async def telegram_webhook(request: Request):
     """Handle Telegram webhook updates"""
     if telegram_app:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         update = Update.de_json(data, telegram_app.bot)
         await telegram_app.process_update(update)
     return {"ok": True}
@@ -342,257 +525,16 @@ async def telegram_webhook(request: Request):
 @app.get("/api/stats")
 async def get_stats():
     """Get download statistics as JSON"""
-    stats = await db.get_stats()
-    return JSONResponse(stats)
+    return await db.get_stats()
 
 
-@app.get("/", response_class=HTMLResponse)
+@app.get("/")
 async def dashboard():
-    """Web dashboard with statistics"""
-    stats = await db.get_stats()
-    
-    html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>TikTok Downloader Bot - Dashboard</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
-    <style>
-        :root {{
-            --bg-primary: #0f0f1a;
-            --bg-secondary: #1a1a2e;
-            --bg-card: rgba(255, 255, 255, 0.05);
-            --text-primary: #ffffff;
-            --text-secondary: #a0a0b0;
-            --accent: #00d4ff;
-            --accent-secondary: #7b2cbf;
-            --success: #00ff88;
-            --danger: #ff4757;
-        }}
-        
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Inter', sans-serif;
-            background: linear-gradient(135deg, var(--bg-primary) 0%, var(--bg-secondary) 100%);
-            min-height: 100vh;
-            color: var(--text-primary);
-            padding: 2rem;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-        }}
-        
-        header {{
-            text-align: center;
-            margin-bottom: 3rem;
-        }}
-        
-        h1 {{
-            font-size: 2.5rem;
-            background: linear-gradient(90deg, var(--accent), var(--accent-secondary));
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            margin-bottom: 0.5rem;
-        }}
-        
-        .subtitle {{
-            color: var(--text-secondary);
-            font-size: 1.1rem;
-        }}
-        
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 1.5rem;
-            margin-bottom: 3rem;
-        }}
-        
-        .stat-card {{
-            background: var(--bg-card);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-            border-radius: 16px;
-            padding: 2rem;
-            text-align: center;
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }}
-        
-        .stat-card:hover {{
-            transform: translateY(-5px);
-            box-shadow: 0 10px 40px rgba(0, 212, 255, 0.2);
-        }}
-        
-        .stat-icon {{
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-        }}
-        
-        .stat-value {{
-            font-size: 2.5rem;
-            font-weight: 700;
-            margin-bottom: 0.5rem;
-        }}
-        
-        .stat-value.users {{
-            color: var(--accent);
-        }}
-        
-        .stat-value.downloads {{
-            color: var(--success);
-        }}
-        
-        .stat-value.failed {{
-            color: var(--danger);
-        }}
-        
-        .stat-value.today {{
-            color: var(--accent-secondary);
-        }}
-        
-        .stat-label {{
-            color: var(--text-secondary);
-            font-size: 1rem;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        
-        .cta-section {{
-            text-align: center;
-            padding: 3rem;
-            background: var(--bg-card);
-            border-radius: 16px;
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }}
-        
-        .cta-section h2 {{
-            margin-bottom: 1rem;
-        }}
-        
-        .cta-section p {{
-            color: var(--text-secondary);
-            margin-bottom: 2rem;
-        }}
-        
-        .telegram-btn {{
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            background: linear-gradient(90deg, #0088cc, #00aaff);
-            color: white;
-            text-decoration: none;
-            padding: 1rem 2rem;
-            border-radius: 50px;
-            font-weight: 600;
-            font-size: 1.1rem;
-            transition: transform 0.3s ease, box-shadow 0.3s ease;
-        }}
-        
-        .telegram-btn:hover {{
-            transform: scale(1.05);
-            box-shadow: 0 10px 30px rgba(0, 136, 204, 0.4);
-        }}
-        
-        footer {{
-            text-align: center;
-            margin-top: 3rem;
-            color: var(--text-secondary);
-            font-size: 0.9rem;
-        }}
-        
-        .live-indicator {{
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            color: var(--success);
-            font-size: 0.9rem;
-            margin-top: 1rem;
-        }}
-        
-        .live-dot {{
-            width: 8px;
-            height: 8px;
-            background: var(--success);
-            border-radius: 50%;
-            animation: pulse 2s infinite;
-        }}
-        
-        @keyframes pulse {{
-            0%, 100% {{ opacity: 1; }}
-            50% {{ opacity: 0.5; }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>🎬 TikTok Downloader Bot</h1>
-            <p class="subtitle">Download TikTok videos without watermark via Telegram</p>
-            <div class="live-indicator">
-                <span class="live-dot"></span>
-                Service Online
-            </div>
-        </header>
-        
-        <div class="stats-grid">
-            <div class="stat-card">
-                <div class="stat-icon">👥</div>
-                <div class="stat-value users">{stats['total_users']:,}</div>
-                <div class="stat-label">Total Users</div>
-            </div>
-            
-            <div class="stat-card">
-                <div class="stat-icon">📥</div>
-                <div class="stat-value downloads">{stats['total_downloads']:,}</div>
-                <div class="stat-label">Total Downloads</div>
-            </div>
-            
-            <div class="stat-card">
-                <div class="stat-icon">✅</div>
-                <div class="stat-value downloads">{stats['successful_downloads']:,}</div>
-                <div class="stat-label">Successful</div>
-            </div>
-            
-            <div class="stat-card">
-                <div class="stat-icon">📅</div>
-                <div class="stat-value today">{stats['today_downloads']:,}</div>
-                <div class="stat-label">Today's Downloads</div>
-            </div>
-        </div>
-        
-        <div class="cta-section">
-            <h2>Start Downloading Now!</h2>
-            <p>Open our Telegram bot and paste any TikTok video link to get started.</p>
-            <a href="https://t.me/tiktokvideodownload_robot" class="telegram-btn">
-                <svg width="24" height="24" viewBox="0 0 24 24" fill="currentColor">
-                    <path d="M12 0C5.373 0 0 5.373 0 12s5.373 12 12 12 12-5.373 12-12S18.627 0 12 0zm5.562 8.161c-.18 1.897-.962 6.502-1.359 8.627-.168.9-.5 1.201-.82 1.23-.697.064-1.226-.461-1.901-.903-1.056-.693-1.653-1.124-2.678-1.8-1.185-.78-.417-1.21.258-1.91.177-.184 3.247-2.977 3.307-3.23.007-.032.014-.15-.056-.212s-.174-.041-.249-.024c-.106.024-1.793 1.139-5.062 3.345-.479.329-.913.489-1.302.481-.428-.009-1.252-.242-1.865-.44-.751-.245-1.349-.374-1.297-.789.027-.216.324-.437.893-.663 3.498-1.524 5.831-2.529 6.998-3.015 3.333-1.386 4.025-1.627 4.477-1.635.099-.002.321.023.465.141a.506.506 0 01.171.325c.016.093.036.306.02.472z"/>
-                </svg>
-                Open in Telegram
-            </a>
-        </div>
-        
-        <footer>
-            <p>Last updated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-            <p style="margin-top: 0.5rem;">Powered by FastAPI • Hosted on Render</p>
-        </footer>
-    </div>
-    
-    <script>
-        // Auto-refresh stats every 30 seconds
-        setTimeout(() => location.reload(), 30000);
-    </script>
-</body>
-</html>
-    """
-    return HTMLResponse(content=html_content)
+    """Web dashboard shell; stats are loaded client-side from /api/stats"""
+    return FileResponse(
+        STATIC_DIR / "index.html",
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
 
 
 if __name__ == "__main__":
@@ -9,7 +9,9 @@ Tables required in Supabase:
 2. downloads - Track download history
 """
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -18,12 +20,23 @@ import httpx
 logger = logging.getLogger(__name__)
 
 
+def _parse_count(headers) -> int:
+    """Read the total from a PostgREST Content-Range header (e.g. '0-24/3573')"""
+    content_range = headers.get('content-range')
+    return int(content_range.rpartition('/')[2]) if content_range else 0
+
+
 class Database:
     """
     Database wrapper using Supabase REST API.
     Falls back to in-memory storage if Supabase is not configured.
     """
     
+    # Download inserts are batched by a background writer
+    WRITE_QUEUE_SIZE = 1000
+    WRITE_BATCH_SIZE = 50
+    WRITE_FLUSH_INTERVAL = 1.0
+    
     def __init__(self, supabase_url: str = "", supabase_key: str = ""):
         self.supabase_url = supabase_url.rstrip('/')
         self.supabase_key = supabase_key
@@ -36,6 +49,18 @@ class Database:
         } if supabase_key else {}
         
         self.connected = False
+        self._rpc_available = True
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Short-lived cache for dashboard stats (shared by all viewers)
+        self._stats_cache: Optional[dict] = None
+        self._stats_cache_ts = 0.0
+        self._stats_ttl = 10.0
+        self._stats_lock = asyncio.Lock()
+        
+        # Batched download writer (started in initialize)
+        self._write_q: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
         
         # In-memory fallback
         self._memory_users = set()
@@ -44,41 +69,63 @@ class Database:
     async def initialize(self):
         """Initialize and test the database connection"""
         if self.supabase_url and self.supabase_key:
+            # One pooled client for the app lifetime so every call reuses
+            # a warm keep-alive connection instead of a fresh TLS handshake
+            self._client = httpx.AsyncClient(
+                base_url=self.rest_url,
+                headers=self.headers,
+                http2=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                timeout=10.0
+            )
             try:
-                async with httpx.AsyncClient() as client:
-                    # Test connection by checking users table
-                    response = await client.get(
-                        f"{self.rest_url}/users?select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    if response.status_code == 200:
-                        self.connected = True
-                        logger.info("Connected to Supabase (REST API)")
-                    else:
-                        logger.error(f"Supabase test failed: {response.status_code} - {response.text}")
-                        self.connected = False
+                # Test connection by checking users table
+                response = await self._client.get(
+                    "/users?select=count",
+                    headers={"Prefer": "count=exact"}
+                )
+                if response.status_code == 200:
+                    self.connected = True
+                    logger.info("Connected to Supabase (REST API)")
+                else:
+                    logger.error(f"Supabase test failed: {response.status_code} - {response.text}")
+                    self.connected = False
             except Exception as e:
                 logger.error(f"Failed to connect to Supabase: {e}")
                 self.connected = False
         
-        if not self.connected:
+        if self.connected:
+            self._write_q = asyncio.Queue(maxsize=self.WRITE_QUEUE_SIZE)
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        else:
             logger.info("Using in-memory storage")
     
+    async def close(self):
+        """Flush pending writes and close the pooled HTTP client"""
+        if self._writer_task:
+            # None tells the writer to flush what it has and exit
+            await self._write_q.put(None)
+            await self._writer_task
+            self._writer_task = None
+        
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+    
     async def track_user(self, user_id: int, username: str):
         """Track a new user or update existing"""
         if self.connected:
             try:
-                async with httpx.AsyncClient() as client:
-                    # Upsert user
-                    await client.post(
-                        f"{self.rest_url}/users",
-                        headers={**self.headers, "Prefer": "resolution=merge-duplicates"},
-                        json={
-                            'telegram_id': user_id,
-                            'username': username,
-                            'last_seen': datetime.now(timezone.utc).isoformat()
-                        }
-                    )
+                # Upsert user
+                await self._client.post(
+                    "/users",
+                    headers={"Prefer": "resolution=merge-duplicates"},
+                    json={
+                        'telegram_id': user_id,
+                        'username': username,
+                        'last_seen': datetime.now(timezone.utc).isoformat()
+                    }
+                )
             except Exception as e:
                 logger.error(f"Error tracking user: {e}")
         
@@ -86,23 +133,21 @@ class Database:
     
     async def track_download(self, user_id: int, url: str, success: bool):
         """Track a download attempt"""
+        # created_at is filled in by the column default (see supabase_schema.sql)
         download_data = {
             'telegram_id': user_id,
-            'url': url[:500],
-            'success': success,
-            'created_at': datetime.now(timezone.utc).isoformat()
+            'url': url if len(url) <= 500 else url[:500],
+            'success': success
         }
         
         if self.connected:
             try:
-                async with httpx.AsyncClient() as client:
-                    await client.post(
-                        f"{self.rest_url}/downloads",
-                        headers=self.headers,
-                        json=download_data
-                    )
-            except Exception as e:
-                logger.error(f"Error tracking download: {e}")
+                self._write_q.put_nowait(download_data)
+            except asyncio.QueueFull:
+                logger.warning("Download write queue full, keeping record in memory only")
+        
+        # Force the next get_stats() to refetch
+        self._stats_cache_ts = 0.0
         
         self._memory_downloads.append({
             'user_id': user_id,
@@ -111,47 +156,111 @@ class Database:
             'created_at': datetime.now(timezone.utc)
         })
     
+    async def _writer_loop(self):
+        """Background task that inserts queued downloads in batches"""
+        loop = asyncio.get_running_loop()
+        running = True
+        while running:
+            item = await self._write_q.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.WRITE_FLUSH_INTERVAL
+            
+            # Collect more rows until the batch is full or the interval expires
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._write_q.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            
+            await self._flush_downloads(batch)
+    
+    async def _flush_downloads(self, batch: list):
+        """Insert a batch of download rows in one request"""
+        try:
+            response = await self._client.post("/downloads", json=batch)
+            if response.status_code >= 400:
+                logger.error(f"Error tracking downloads: {response.status_code} - {response.text}")
+        except Exception as e:
+            logger.error(f"Error tracking downloads: {e}")
+        
+        self._stats_cache_ts = 0.0
+    
+    async def _rpc(self, function: str, **params) -> Optional[dict]:
+        """
+        Call a stats function from supabase_schema.sql.
+        Returns None if the function is not deployed so callers can fall back.
+        """
+        if not self._rpc_available:
+            return None
+        
+        response = await self._client.get(f"/rpc/{function}", params=params)
+        if response.status_code == 404:
+            logger.warning(f"Supabase function {function}() not found, falling back to count queries")
+            self._rpc_available = False
+            return None
+        response.raise_for_status()
+        return response.json()
+    
+    async def _count(self, query: str) -> int:
+        """Run a PostgREST count query and return the exact row count"""
+        response = await self._client.get(query, headers={"Prefer": "count=exact"})
+        return _parse_count(response.headers)
+    
     async def get_stats(self) -> dict:
-        """Get aggregated statistics (for dashboard)"""
+        """Get aggregated statistics (for dashboard), cached for a few seconds"""
+        if self._stats_cache and time.monotonic() - self._stats_cache_ts < self._stats_ttl:
+            return self._stats_cache
+        
+        async with self._stats_lock:
+            # Another caller may have refreshed the cache while we waited
+            if self._stats_cache and time.monotonic() - self._stats_cache_ts < self._stats_ttl:
+                return self._stats_cache
+            
+            stats = await self._fetch_stats()
+            self._stats_cache = stats
+            self._stats_cache_ts = time.monotonic()
+            return stats
+    
+    async def _fetch_stats(self) -> dict:
+        """Fetch aggregated statistics from Supabase or memory"""
         if self.connected:
             try:
-                async with httpx.AsyncClient() as client:
-                    # Get total users
-                    users_resp = await client.get(
-                        f"{self.rest_url}/users?select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    total_users = int(users_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
-                    # Get total downloads
-                    downloads_resp = await client.get(
-                        f"{self.rest_url}/downloads?select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    total_downloads = int(downloads_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
-                    # Get successful downloads
-                    success_resp = await client.get(
-                        f"{self.rest_url}/downloads?success=eq.true&select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    successful_downloads = int(success_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
-                    # Get today's downloads
-                    today = datetime.now(timezone.utc).date().isoformat()
-                    today_resp = await client.get(
-                        f"{self.rest_url}/downloads?created_at=gte.{today}&select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    today_downloads = int(today_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
+                data = await self._rpc("dashboard_stats")
+                if data is not None:
                     return {
-                        'total_users': total_users,
-                        'total_downloads': total_downloads,
-                        'successful_downloads': successful_downloads,
-                        'failed_downloads': total_downloads - successful_downloads,
-                        'today_downloads': today_downloads
+                        'total_users': data['total_users'],
+                        'total_downloads': data['total_downloads'],
+                        'successful_downloads': data['successful_downloads'],
+                        'failed_downloads': data['total_downloads'] - data['successful_downloads'],
+                        'today_downloads': data['today_downloads']
                     }
+                
+                today = datetime.now(timezone.utc).date().isoformat()
+                
+                # Run all count queries concurrently
+                total_users, total_downloads, successful_downloads, today_downloads = await asyncio.gather(
+                    self._count("/users?select=count"),
+                    self._count("/downloads?select=count"),
+                    self._count("/downloads?success=eq.true&select=count"),
+                    self._count(f"/downloads?created_at=gte.{today}&select=count")
+                )
+                
+                return {
+                    'total_users': total_users,
+                    'total_downloads': total_downloads,
+                    'successful_downloads': successful_downloads,
+                    'failed_downloads': total_downloads - successful_downloads,
+                    'today_downloads': today_downloads
+                }
             except Exception as e:
                 logger.error(f"Error getting stats from Supabase: {e}")
         
@@ -175,35 +284,30 @@ class Database:
         """Get statistics for a specific user only"""
         if self.connected:
             try:
-                async with httpx.AsyncClient() as client:
-                    # Get user's total downloads
-                    total_resp = await client.get(
-                        f"{self.rest_url}/downloads?telegram_id=eq.{user_id}&select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    total_downloads = int(total_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
-                    # Get user's successful downloads
-                    success_resp = await client.get(
-                        f"{self.rest_url}/downloads?telegram_id=eq.{user_id}&success=eq.true&select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    successful_downloads = int(success_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
-                    # Get user's today downloads
-                    today = datetime.now(timezone.utc).date().isoformat()
-                    today_resp = await client.get(
-                        f"{self.rest_url}/downloads?telegram_id=eq.{user_id}&created_at=gte.{today}&select=count",
-                        headers={**self.headers, "Prefer": "count=exact"}
-                    )
-                    today_downloads = int(today_resp.headers.get('content-range', '0-0/0').split('/')[-1])
-                    
+                data = await self._rpc("user_stats", uid=user_id)
+                if data is not None:
                     return {
-                        'total_downloads': total_downloads,
-                        'successful_downloads': successful_downloads,
-                        'failed_downloads': total_downloads - successful_downloads,
-                        'today_downloads': today_downloads
+                        'total_downloads': data['total_downloads'],
+                        'successful_downloads': data['successful_downloads'],
+                        'failed_downloads': data['total_downloads'] - data['successful_downloads'],
+                        'today_downloads': data['today_downloads']
                     }
+                
+                today = datetime.now(timezone.utc).date().isoformat()
+                
+                # Run all count queries concurrently
+                total_downloads, successful_downloads, today_downloads = await asyncio.gather(
+                    self._count(f"/downloads?telegram_id=eq.{user_id}&select=count"),
+                    self._count(f"/downloads?telegram_id=eq.{user_id}&success=eq.true&select=count"),
+                    self._count(f"/downloads?telegram_id=eq.{user_id}&created_at=gte.{today}&select=count")
+                )
+                
+                return {
+                    'total_downloads': total_downloads,
+                    'successful_downloads': successful_downloads,
+                    'failed_downloads': total_downloads - successful_downloads,
+                    'today_downloads': today_downloads
+                }
             except Exception as e:
                 logger.error(f"Error getting user stats from Supabase: {e}")
         
@@ -6,17 +6,72 @@ Lightweight HTTP-based downloader for the bot service.
 No browser required - uses direct API calls.
 """
 
+import os
 import re
+import time
+import uuid
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from html import unescape
 from pathlib import Path
+from collections import Counter
 from typing import Optional, Tuple
+from urllib.parse import urlsplit
 
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 logger = logging.getLogger(__name__)
 
+# The 'tt' token on the ssstik.io page, as an <input>, a JS assignment or a
+# data attribute; one alternation so the page is scanned only once, with the
+# <input> gap bounded so a miss can't backtrack far
+_TT_RE = re.compile(
+    r"(?:name=['\"]tt['\"][^>]{0,200}value=['\"]([^'\"]+)['\"]"
+    r"|\btt\s*[:=]\s*['\"]([^'\"]+)['\"]"
+    r"|data-tt=['\"]([^'\"]+)['\"])",
+    re.IGNORECASE
+)
+# Looser fallback for prefixed JS names the \btt branch skips (e.g. s_tt = '...')
+_SCRIPT_TT_RE = re.compile(r"tt\s*[:=]\s*['\"]([^'\"]+)['\"]")
+# Fallback parse only needs <input> tags (e.g. value= written before name=)
+_TOKEN_STRAINER = SoupStrainer('input')
+
+# <a href="...">text</a> in the API's HTMX fragment, and inner tags to strip
+_LINK_RE = re.compile(r'<a\s[^>]*?href=["\']([^"\']+)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+# Patterns for the video ID in a TikTok URL
+_VIDEO_ID_RE = [
+    re.compile(r'/video/(\d+)'),
+    re.compile(r'/v/(\d+)'),
+    re.compile(r'(\d{19})')
+]
+
+
+class TokenRejected(Exception):
+    """The ssstik.io API answered with a 4xx, usually an expired 'tt' token."""
+
+
+def _normalize_url(url: str) -> str:
+    """Reduce a TikTok link to scheme, host and path for de-duplication"""
+    parts = urlsplit(url.strip())
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _discard_file(f, path: str):
+    # close() waits for a write still running in another thread
+    f.close()
+    _remove_file(path)
+
 
 class SsstikDownloader:
     """
@@ -27,9 +82,68 @@ class SsstikDownloader:
     PAGE_URL = "https://ssstik.io/en-1"
     API_URL = "https://ssstik.io/abc?url=dl"
     DOWNLOAD_DIR = Path("/tmp/downloads")
+    _dir_ready = False
+    
+    # Telegram can fetch videos from a URL itself up to 20 MB
+    DIRECT_SEND_LIMIT = 19 * 1024 * 1024
+    
+    # Write size when saving videos (fewer syscalls and thread hops than 64 KB)
+    CHUNK_SIZE = 1 << 20
+    
+    # How long a fetched 'tt' token is reused (seconds)
+    TOKEN_TTL = 120.0
     
     def __init__(self):
-        self.DOWNLOAD_DIR.mkdir(exist_ok=True)
+        if not SsstikDownloader._dir_ready:
+            self.DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+            SsstikDownloader._dir_ready = True
+        self._dir_str = str(self.DOWNLOAD_DIR) + os.sep
+        
+        # Cached 'tt' token shared by concurrent downloads
+        self._token: Optional[str] = None
+        self._token_ts = 0.0
+        self._token_lock = asyncio.Lock()
+        
+        # Saved videos still in use (video ID or short link -> path, path -> users)
+        self._files: dict[str, str] = {}
+        self._file_refs: Counter[str] = Counter()
+        
+        # Downloads running per video ID (or short link), joined by concurrent requests
+        self._pending: dict[str, asyncio.Future] = {}
+        self._pending_waiters: Counter[str] = Counter()
+        
+        # Shared by every download so connections to ssstik.io stay warm
+        self._client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30.0),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:147.0) Gecko/20100101 Firefox/147.0',
+                'Accept-Language': 'en-US,en;q=0.9'
+            }
+        )
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        await self._client.aclose()
+    
+    def retain(self, path: str, count: int = 1):
+        """Add users to a saved video so release() keeps it around."""
+        self._file_refs[path] += count
+    
+    async def release(self, path: str):
+        """Drop one user of a saved video, deleting the file after the last."""
+        self._file_refs[path] -= 1
+        if self._file_refs[path] > 0:
+            return
+        
+        del self._file_refs[path]
+        for video_id, saved_path in list(self._files.items()):
+            if saved_path == path:
+                del self._files[video_id]
+        
+        await asyncio.to_thread(_remove_file, path)
     
     async def _get_token(self, client: httpx.AsyncClient) -> str:
         """Fetch the 'tt' token from ssstik.io page."""
@@ -43,32 +157,39 @@ class SsstikDownloader:
         html = response.text
         
         # Try to find the 'tt' token
-        patterns = [
-            r"name=['\"]tt['\"].*?value=['\"]([^'\"]+)['\"]",
-            r"tt\s*[:=]\s*['\"]([^'\"]+)['\"]",
-            r"data-tt=['\"]([^'\"]+)['\"]"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
-            if match:
-                return match.group(1)
+        match = _TT_RE.search(html)
+        if match:
+            return next(group for group in match.groups() if group)
+        
+        match = _SCRIPT_TT_RE.search(html)
+        if match:
+            return match.group(1)
         
-        # Try BeautifulSoup
-        soup = BeautifulSoup(html, 'html.parser')
+        # Fall back to parsing the page
+        soup = BeautifulSoup(html, 'lxml', parse_only=_TOKEN_STRAINER)
         tt_input = soup.find('input', {'name': 'tt'})
         if tt_input and tt_input.get('value'):
             return tt_input['value']
         
-        # Look in script tags
-        for script in soup.find_all('script'):
-            if script.string and 'tt' in str(script.string):
-                match = re.search(r"tt\s*[:=]\s*['\"]([^'\"]+)['\"]", str(script.string))
-                if match:
-                    return match.group(1)
-        
         raise Exception("Could not find 'tt' token")
     
+    async def _get_cached_token(self) -> str:
+        """Return the 'tt' token, refetching it once TOKEN_TTL has passed."""
+        async with self._token_lock:
+            if self._token and time.monotonic() - self._token_ts < self.TOKEN_TTL:
+                return self._token
+            
+            self._token = await self._get_token(self._client)
+            self._token_ts = time.monotonic()
+            return self._token
+    
+    async def _invalidate_token(self, token: str):
+        """Drop a rejected token so the next download fetches a fresh one."""
+        async with self._token_lock:
+            # Another download may already have replaced it
+            if self._token == token:
+                self._token = None
+    
     async def _fetch_download_links(
         self, 
         client: httpx.AsyncClient, 
@@ -96,23 +217,26 @@ class SsstikDownloader:
         
         response = await client.post(self.API_URL, data=data, headers=headers)
         
+        if 400 <= response.status_code < 500:
+            raise TokenRejected(f"API request failed: {response.status_code}")
         if response.status_code != 200:
             raise Exception(f"API request failed: {response.status_code}")
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         # Find download links
         download_url = None
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            text = link.get_text().lower()
+        for href, inner in _LINK_RE.findall(response.text):
+            # Cheap href test first; only candidate links get their text cleaned up
+            if 'tikcdn.io' not in href and '.mp4' not in href:
+                continue
             
-            if 'tikcdn.io' in href or '.mp4' in href:
-                if 'without' in text or 'no watermark' in text:
-                    download_url = href
-                    break
-                elif not download_url:
-                    download_url = href
+            href = unescape(href)
+            text = (_TAG_RE.sub('', inner) if '<' in inner else inner).lower()
+            
+            if 'without' in text or 'no watermark' in text:
+                download_url = href
+                break
+            elif not download_url:
+                download_url = href
         
         if not download_url:
             raise Exception("No download link found")
@@ -125,71 +249,167 @@ class SsstikDownloader:
         
         return download_url
     
-    async def download_video(self, tiktok_url: str) -> dict:
-        """Download a TikTok video."""
+    async def download_video(
+        self,
+        tiktok_url: str,
+        allow_direct: bool = False,
+        resolved_url: Optional[str] = None
+    ) -> dict:
+        """
+        Download a TikTok video.
+        
+        With allow_direct, videos under DIRECT_SEND_LIMIT are not saved;
+        the CDN link is returned as 'direct_url' instead. Passing that link
+        back as resolved_url saves it without asking ssstik.io again.
+        
+        A returned download_path must be handed back with release().
+        """
+        video_id = self._extract_video_id(tiktok_url)
+        # Short links carry no video ID, those are shared by normalized URL
+        key = video_id or _normalize_url(tiktok_url)
+        
+        while True:
+            # Same video already saved for someone else, share the file
+            path = self._files.get(key)
+            if path:
+                self.retain(path)
+                logger.info(f"Reusing saved video: {path}")
+                return {
+                    'success': True,
+                    'url': tiktok_url,
+                    'download_path': path,
+                    'direct_url': None,
+                    'size': None,
+                    'error': None,
+                    'timestamp': datetime.now(timezone.utc).isoformat()
+                }
+            
+            # Same video being downloaded right now, wait for that one
+            fut = self._pending.get(key)
+            if fut is None:
+                break
+            self._pending_waiters[key] += 1
+            result = await asyncio.shield(fut)
+            if result['download_path'] or allow_direct or not result['success']:
+                return dict(result, url=tiktok_url)
+            # Only a direct URL came back but this caller needs the file, go again
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[key] = fut
+        
         result = {
             'success': False,
             'url': tiktok_url,
             'download_path': None,
+            'direct_url': None,
+            'size': None,
+            'error': 'Download interrupted',
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+        try:
+            result = await self._download_video(tiktok_url, video_id, allow_direct, resolved_url)
+        finally:
+            del self._pending[key]
+            waiters = self._pending_waiters.pop(key, 0)
+            if result['download_path']:
+                self._files[key] = result['download_path']
+                if waiters:
+                    # Every waiter releases the file once
+                    self.retain(result['download_path'], waiters)
+            fut.set_result(result)
+        
+        return result
+    
+    async def _download_video(
+        self,
+        tiktok_url: str,
+        video_id: Optional[str],
+        allow_direct: bool,
+        resolved_url: Optional[str] = None
+    ) -> dict:
+        """Fetch token, resolve the CDN link and save the video."""
+        now = datetime.now(timezone.utc)
+        stamp = now.strftime('%Y%m%d_%H%M%S')
+        
+        result = {
+            'success': False,
+            'url': tiktok_url,
+            'download_path': None,
+            'direct_url': None,
+            'size': None,
             'error': None,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': now.isoformat()
         }
         
-        async with httpx.AsyncClient(
-            follow_redirects=True,
-            timeout=60.0,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:147.0) Gecko/20100101 Firefox/147.0',
-                'Accept-Language': 'en-US,en;q=0.9'
-            }
-        ) as client:
-            try:
+        try:
+            if resolved_url:
+                download_url = resolved_url
+            else:
                 # Get token
-                token = await self._get_token(client)
+                token = await self._get_cached_token()
                 
                 # Get download link
-                download_url = await self._fetch_download_links(client, tiktok_url, token)
+                try:
+                    download_url = await self._fetch_download_links(self._client, tiktok_url, token)
+                except TokenRejected:
+                    # The token has probably expired, fetch a fresh one next time
+                    await self._invalidate_token(token)
+                    raise
                 logger.info(f"Download URL: {download_url[:80]}...")
-                
-                # Download video
-                video_response = await client.get(
-                    download_url,
-                    headers={'Referer': 'https://ssstik.io/'}
-                )
-                
+            
+            # Download video
+            async with self._client.stream(
+                'GET',
+                download_url,
+                headers={'Referer': 'https://ssstik.io/'}
+            ) as video_response:
                 if video_response.status_code != 200:
                     raise Exception(f"Download failed: {video_response.status_code}")
                 
-                # Save file
-                video_id = self._extract_video_id(tiktok_url)
-                filename = f"ssstik_{video_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.mp4"
-                download_path = self.DOWNLOAD_DIR / filename
-                
-                with open(download_path, 'wb') as f:
-                    f.write(video_response.content)
+                size = int(video_response.headers.get('content-length', 0)) or None
+                result['size'] = size
                 
-                logger.info(f"Downloaded: {filename}")
+                if allow_direct and size and size <= self.DIRECT_SEND_LIMIT:
+                    # Small enough for Telegram to fetch, skip the body
+                    logger.info(f"Returning direct URL ({size} bytes)")
+                    result['success'] = True
+                    result['direct_url'] = download_url
+                    return result
                 
-                result['success'] = True
-                result['download_path'] = str(download_path)
+                # Stream the body straight to disk
+                # Random suffix so no two downloads ever share (and delete) a file
+                filename = f"ssstik_{video_id or 'video'}_{stamp}_{uuid.uuid4().hex[:8]}.mp4"
+                download_path = self._dir_str + filename
                 
-            except Exception as e:
-                logger.error(f"Error: {e}")
-                result['error'] = str(e)
+                # File I/O runs in a worker thread so the event loop keeps serving other downloads
+                f = await asyncio.to_thread(open, download_path, 'wb')
+                try:
+                    async for chunk in video_response.aiter_bytes(chunk_size=self.CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+                except BaseException:
+                    # Shielded so a second cancellation can't leave a partial file behind
+                    await asyncio.shield(asyncio.to_thread(_discard_file, f, download_path))
+                    raise
+                await asyncio.to_thread(f.close)
+            
+            logger.info(f"Downloaded: {filename}")
+            
+            result['success'] = True
+            result['download_path'] = download_path
+            
+            self.retain(download_path)
+            
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            result['error'] = str(e)
         
         return result
     
-    def _extract_video_id(self, url: str) -> str:
-        """Extract video ID from TikTok URL."""
-        patterns = [
-            r'/video/(\d+)',
-            r'/v/(\d+)',
-            r'(\d{19})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
+    def _extract_video_id(self, url: str) -> Optional[str]:
+        """Extract video ID from TikTok URL (None for short links)."""
+        for pattern in _VIDEO_ID_RE:
+            match = pattern.search(url)
             if match:
                 return match.group(1)
         
-        return datetime.utcnow().strftime('%Y%m%d%H%M%S')
+        return None
@@ -24,6 +24,38 @@ CREATE TABLE IF NOT EXISTS downloads (
 CREATE INDEX IF NOT EXISTS idx_downloads_telegram_id ON downloads(telegram_id);
 CREATE INDEX IF NOT EXISTS idx_downloads_created_at ON downloads(created_at);
 CREATE INDEX IF NOT EXISTS idx_downloads_success ON downloads(success);
+CREATE INDEX IF NOT EXISTS idx_downloads_telegram_id_created_at ON downloads(telegram_id, created_at);
+
+-- Stats functions (one round-trip per dashboard / per /stats command)
+CREATE OR REPLACE FUNCTION dashboard_stats()
+RETURNS JSON
+LANGUAGE SQL STABLE
+AS $$
+    SELECT json_build_object(
+        'total_users', (SELECT count(*) FROM users),
+        'total_downloads', count(*),
+        'successful_downloads', count(*) FILTER (WHERE success),
+        'today_downloads', count(*) FILTER (
+            WHERE created_at >= date_trunc('day', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        )
+    )
+    FROM downloads;
+$$;
+
+CREATE OR REPLACE FUNCTION user_stats(uid BIGINT)
+RETURNS JSON
+LANGUAGE SQL STABLE
+AS $$
+    SELECT json_build_object(
+        'total_downloads', count(*),
+        'successful_downloads', count(*) FILTER (WHERE success),
+        'today_downloads', count(*) FILTER (
+            WHERE created_at >= date_trunc('day', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        )
+    )
+    FROM downloads
+    WHERE telegram_id = uid;
+$$;
 
 -- Enable Row Level Security (optional but recommended)
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;